@@ -0,0 +1,43 @@
+"""
+Small sqlite-backed key/value cache with per-entry TTL, used to remember
+PR evaluation results between runs. Values are stored as JSON; an entry
+with no TTL never expires.
+"""
+import json
+import time
+import sqlite3
+from typing import Any, Optional
+
+CACHE_DB = "dependabot_automerge_cache.db"
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(CACHE_DB)
+    conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+    return conn
+
+
+def get(key: str) -> Optional[Any]:
+    with _connect() as conn:
+        row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    value, expires_at = row
+    if expires_at is not None and expires_at < time.time():
+        delete(key)
+        return None
+    return json.loads(value)
+
+
+def set(key: str, value: Any, ttl: Optional[float] = None) -> None:
+    expires_at = time.time() + ttl if ttl is not None else None
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), expires_at),
+        )
+
+
+def delete(key: str) -> None:
+    with _connect() as conn:
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
@@ -1,154 +1,784 @@
 import os
 import sys
 import time
+import random
+import asyncio
 import logging
+import logging.handlers
+import sqlite3
 import argparse
-from typing import List, Optional
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import orjson
+import requests
+
+import cache
 from github import Github, Repository, PullRequest
 from github.GithubException import GithubException, RateLimitExceededException
 
-logging.basicConfig(
-    filename="dependabot_automerge.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger(__name__)
 
 
-def get_github_client(token_env_var: str = "GITHUB_TOKEN") -> Github:
+def setup_logging(verbose: bool = False) -> logging.handlers.MemoryHandler:
+    """
+    Route all records through a MemoryHandler that flushes to the log file in
+    batches of 50 (immediately on ERROR), so the hot loop never blocks on a
+    synchronous write per record. With verbose, records also stream to stdout.
+    Returns the buffering handler so callers can flush it before exiting.
+    """
+    file_handler = logging.FileHandler("dependabot_automerge.log")
+    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    memory_handler = logging.handlers.MemoryHandler(capacity=50, flushLevel=logging.ERROR, target=file_handler)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(memory_handler)
+    if verbose:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter("%(message)s"))
+        root.addHandler(stream_handler)
+    return memory_handler
+
+
+API_URL = "https://api.github.com"
+GRAPHQL_URL = "https://api.github.com/graphql"
+CACHE_DB = "dependabot_automerge_cache.db"
+
+# Negative CI results are cached briefly so re-runs skip the network; keep the
+# TTL short since a re-triggered check can flip the result at any time.
+FAILED_CI_TTL = 600
+
+RATE_LIMIT_RETRIES = 5
+
+BOT_LOGINS = frozenset(("dependabot[bot]", "github-security[bot]"))
+
+
+def retry_on_rate_limit(func):
+    """
+    Retry a PyGithub call when the primary rate limit is exhausted (sleep
+    until the advertised reset) or a secondary/abuse limit triggers (honor
+    Retry-After, else jittered exponential backoff). Other errors propagate.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        delay = 2.0
+        for _ in range(RATE_LIMIT_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except RateLimitExceededException as e:
+                reset = (e.headers or {}).get("x-ratelimit-reset")
+                wait = max(0, int(reset) - time.time()) + 1 if reset else delay
+                logger.warning(f"Rate limit exceeded in {func.__name__}; sleeping {wait:.0f}s until reset.")
+                time.sleep(wait)
+            except GithubException as e:
+                if e.status == 403 and "rate limit" in str(e.data).lower():
+                    retry_after = (e.headers or {}).get("retry-after")
+                    wait = int(retry_after) if retry_after else delay + random.uniform(0, delay)
+                    logger.warning(f"Secondary rate limit in {func.__name__}; backing off {wait:.0f}s.")
+                    time.sleep(wait)
+                    delay = min(delay * 2, 120)
+                else:
+                    raise
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+VIEWER_QUERY = """
+query {
+  viewer {
+    login
+    organizations(first: 100) {
+      nodes { login }
+    }
+  }
+}
+"""
+
+# One search query returns only the bot PRs themselves, with the computed
+# mergeable field and the CI rollup state, so nothing is fetched for the
+# (far more numerous) repos and PRs that would be filtered out anyway.
+CANDIDATES_QUERY = """
+query($searchQuery: String!, $cursor: String) {
+  search(query: $searchQuery, type: ISSUE, first: 100, after: $cursor) {
+    pageInfo { hasNextPage endCursor }
+    nodes {
+      ... on PullRequest {
+        id
+        number
+        title
+        isDraft
+        mergeable
+        author { login }
+        repository {
+          nameWithOwner
+          name
+          databaseId
+          viewerPermission
+        }
+        commits(last: 1) {
+          nodes {
+            commit {
+              oid
+              statusCheckRollup { state }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Server-side auto-merge: GitHub merges the PR itself once it is mergeable
+# with passing required checks, so no client ever has to poll for that state.
+ENABLE_AUTO_MERGE_MUTATION = """
+mutation($pullRequestId: ID!, $mergeMethod: PullRequestMergeMethod!) {
+  enablePullRequestAutoMerge(input: {pullRequestId: $pullRequestId, mergeMethod: $mergeMethod}) {
+    pullRequest { number }
+  }
+}
+"""
+
+
+class GraphQLError(Exception):
+    """Raised when the GraphQL endpoint returns errors in the response body."""
+
+
+@dataclass(slots=True)
+class PRRef:
+    """
+    Lightweight handle on a PR, built once from the list-pulls payload so the
+    scan never resolves attributes through PyGithub's lazy object graph.
+    """
+
+    repo_name: str
+    number: int
+    head_sha: str
+    title: str
+
+    @classmethod
+    def from_pull(cls, pr: "PullRequest.PullRequest") -> "PRRef":
+        raw = pr._rawData
+        return cls(
+            repo_name=raw["base"]["repo"]["full_name"],
+            number=raw["number"],
+            head_sha=raw["head"]["sha"],
+            title=raw["title"],
+        )
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to space out API calls across workers."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Replaces the old per-PR time.sleep(0.2); shared by all worker threads.
+REQUEST_BUCKET = TokenBucket(rate=5.0, capacity=5)
+
+# GitHub's abuse detection dislikes concurrent content mutations, so cap the
+# number of in-flight merge calls regardless of how many workers are scanning.
+MERGE_SLOTS = threading.Semaphore(2)
+
+
+def _cache_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(CACHE_DB)
+    conn.execute("CREATE TABLE IF NOT EXISTS etags (url TEXT PRIMARY KEY, etag TEXT, body TEXT)")
+    return conn
+
+
+def _etag_lookup(url: str) -> Optional[Tuple[str, str]]:
+    with _cache_db() as conn:
+        row = conn.execute("SELECT etag, body FROM etags WHERE url = ?", (url,)).fetchone()
+    return row
+
+
+def _etag_store(url: str, etag: str, body: str) -> None:
+    with _cache_db() as conn:
+        conn.execute("INSERT OR REPLACE INTO etags (url, etag, body) VALUES (?, ?, ?)", (url, etag, body))
+
+
+def make_rest_session(token: str) -> requests.Session:
+    session = requests.Session()
+    session.headers["Authorization"] = f"token {token}"
+    session.headers["Accept"] = "application/vnd.github+json"
+    return session
+
+
+def get_json(session: requests.Session, url: str) -> Dict:
+    """
+    GET a REST endpoint with a conditional request. A 304 response costs no
+    rate limit and carries no body, so the ETag and payload of every 200 are
+    persisted and replayed via If-None-Match on later runs.
+    """
+    cached = _etag_lookup(url)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = session.get(url, headers=headers, timeout=30)
+    if response.status_code == 304 and cached:
+        return orjson.loads(cached[1])
+    response.raise_for_status()
+    etag = response.headers.get("ETag")
+    if etag:
+        _etag_store(url, etag, response.text)
+    return orjson.loads(response.content)
+
+
+def get_github_token(token_env_var: str = "GITHUB_TOKEN") -> str:
     token = os.getenv(token_env_var)
     if not token:
         logger.error(f"Environment variable '{token_env_var}' is not set.")
         print(f"Error: Please set your {token_env_var} environment variable.")
         sys.exit(1)
-    return Github(token)
+    return token
+
 
+def get_github_client(token: str) -> Github:
+    # per_page=100 (the API maximum) cuts pagination round-trips 3.3x versus
+    # PyGithub's default of 30.
+    return Github(token, per_page=100)
 
-def is_dependabot_pr(pr: PullRequest.PullRequest, bots: Optional[List[str]] = None) -> bool:
+
+def graphql_request(token: str, query: str, variables: Optional[Dict] = None) -> Dict:
+    response = requests.post(
+        GRAPHQL_URL,
+        json={"query": query, "variables": variables or {}},
+        headers={"Authorization": f"bearer {token}"},
+        timeout=30,
+    )
+    response.raise_for_status()
+    payload = orjson.loads(response.content)
+    if payload.get("errors"):
+        raise GraphQLError(payload["errors"])
+    return payload["data"]
+
+
+def fetch_candidates(token: str, bots: Optional[frozenset] = None) -> List[Dict]:
+    """
+    Fetch all open bot PRs on the viewer's repositories with a paginated
+    GraphQL search query, so only matching PRs are ever transferred. Returns
+    one dict per PR with the fields needed to decide whether it can be
+    merged, so no follow-up polling is required.
+    """
     if bots is None:
-        bots = ["dependabot[bot]", "github-security[bot]"]
-    return pr.user.login in bots
+        bots = BOT_LOGINS
+
+    viewer = graphql_request(token, VIEWER_QUERY)["viewer"]
+    # Repeated user:/org: qualifiers are OR'd, so one query spans the
+    # viewer's own repos and every organization they belong to.
+    scopes = [f"user:{viewer['login']}"]
+    scopes.extend(f"org:{org['login']}" for org in viewer["organizations"]["nodes"])
+    authors = " ".join(f"author:app/{bot.removesuffix('[bot]')}" for bot in bots)
+    search_query = f"is:pr is:open {' '.join(scopes)} {authors}"
+
+    candidates = []
+    cursor = None
+    while True:
+        data = graphql_request(token, CANDIDATES_QUERY, {"searchQuery": search_query, "cursor": cursor})
+        search = data["search"]
+        for pr in search["nodes"]:
+            repo = pr["repository"]
+            if repo["viewerPermission"] not in ("WRITE", "MAINTAIN", "ADMIN"):
+                continue
+            author = (pr.get("author") or {}).get("login", "")
+            if author not in bots and f"{author}[bot]" not in bots:
+                continue
+            commit_nodes = pr["commits"]["nodes"]
+            commit = commit_nodes[0]["commit"] if commit_nodes else {}
+            rollup = commit.get("statusCheckRollup")
+            candidates.append(
+                {
+                    "node_id": pr["id"],
+                    "repo_full_name": repo["nameWithOwner"],
+                    "repo_name": repo["name"],
+                    "repo_id": repo["databaseId"],
+                    "number": pr["number"],
+                    "title": pr["title"],
+                    "draft": pr["isDraft"],
+                    "mergeable": pr["mergeable"],
+                    "head_sha": commit.get("oid"),
+                    "rollup_state": rollup["state"] if rollup else None,
+                }
+            )
+        page_info = search["pageInfo"]
+        if not page_info["hasNextPage"]:
+            break
+        cursor = page_info["endCursor"]
+    return candidates
+
+
+async def _resolve_candidate_mergeable(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    candidate: Dict,
+    attempts: int = 2,
+    delay: int = 3,
+) -> None:
+    url = f"{API_URL}/repos/{candidate['repo_full_name']}/pulls/{candidate['number']}"
+    async with semaphore:
+        for attempt in range(attempts):
+            # No conditional request here: GitHub fills in mergeable in the
+            # background without touching the PR's ETag, so replaying
+            # If-None-Match can 304 back the cached null forever.
+            try:
+                response = await client.get(url)
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+            except httpx.HTTPError as e:
+                logger.warning(f"Failed to fetch PR #{candidate['number']} in {candidate['repo_full_name']}: {e}")
+                return
+            mergeable = data.get("mergeable")
+            if mergeable is not None:
+                candidate["mergeable"] = "MERGEABLE" if mergeable else "CONFLICTING"
+                return
+            if attempt + 1 < attempts:
+                await asyncio.sleep(delay)
+
+
+async def _resolve_unknown_mergeables(token: str, candidates: List[Dict]) -> None:
+    headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github+json"}
+    semaphore = asyncio.Semaphore(10)
+    async with httpx.AsyncClient(base_url=API_URL, http2=True, headers=headers, timeout=30) as client:
+        await asyncio.gather(
+            *(_resolve_candidate_mergeable(client, semaphore, candidate) for candidate in candidates)
+        )
+
+
+def resolve_unknown_mergeables(token: str, candidates: List[Dict]) -> None:
+    """
+    GitHub computes the mergeable field lazily, so some candidates come back
+    from GraphQL as UNKNOWN. Refetch those PRs concurrently over a multiplexed
+    HTTP/2 connection; a PR still undecided after one 3s retry is left
+    UNKNOWN for the webhook path or the next run rather than polled further.
+    """
+    unknown = [c for c in candidates if c["mergeable"] == "UNKNOWN"]
+    if unknown:
+        asyncio.run(_resolve_unknown_mergeables(token, unknown))
 
 
-def wait_for_mergeable(pr: PullRequest.PullRequest, attempts: int = 5, delay: int = 5) -> bool:
-    for _ in range(attempts):
-        try:
-            pr.update()
-        except GithubException as e:
-            logger.warning(f"Failed to update PR #{pr.number}: {e}")
-            return False
-        if pr.mergeable is not None:
-            return pr.mergeable
-        time.sleep(delay)
-    return False
+def is_dependabot_pr(pr: PullRequest.PullRequest, bots: Optional[frozenset] = None) -> bool:
+    if bots is None:
+        bots = BOT_LOGINS
+    # Read the login straight from the list-pulls payload: going through
+    # pr.user can trigger a lazy _completeIfNotSet round-trip.
+    return pr._rawData["user"]["login"] in bots
+
+
+# Dependabot often opens many PRs per repo; merge them concurrently but keep
+# the fan-out small so one repo cannot monopolize the merge slots.
+MERGES_PER_REPO = 4
+
+
+def rest_merge_pull(session: requests.Session, repo_full_name: str, number: int, merge_method: str) -> None:
+    """Merge a PR with a single REST PUT, no object materialization."""
+    for _ in range(RATE_LIMIT_RETRIES):
+        with MERGE_SLOTS:
+            response = session.put(
+                f"{API_URL}/repos/{repo_full_name}/pulls/{number}/merge",
+                json={
+                    "merge_method": merge_method,
+                    "commit_message": "Auto-merged by dependabot-auto-merge script",
+                },
+                timeout=30,
+            )
+        if response.status_code == 403 and "secondary rate limit" in response.text.lower():
+            wait = random.uniform(30, 60)
+            logger.warning(f"Secondary rate limit merging PR #{number} in {repo_full_name}; backing off {wait:.0f}s.")
+            time.sleep(wait)
+            continue
+        response.raise_for_status()
+        return
+    response.raise_for_status()
+
+
+@retry_on_rate_limit
+def _list_open_pulls(repo: Repository.Repository) -> List[PullRequest.PullRequest]:
+    # Materialize the paginated list here so the HTTP of every page happens
+    # under the retry wrapper, not later during iteration in the caller.
+    return list(repo.get_pulls(state="open", sort="updated", direction="desc"))
+
+
+@retry_on_rate_limit
+def _merge_pull(pr: PullRequest.PullRequest, merge_method: str) -> None:
+    with MERGE_SLOTS:
+        pr.merge(merge_method=merge_method, commit_message="Auto-merged by dependabot-auto-merge script")
 
 
-def ci_checks_passed(pr: PullRequest.PullRequest) -> bool:
+def combined_status_state(session: requests.Session, repo_full_name: str, number: int, sha: Optional[str]) -> str:
+    """
+    REST fallback for heads with no status check rollup: fetch the combined
+    status (conditionally, so unchanged heads cost no rate limit) and return
+    'success', 'failure' or 'pending'. Anything that isn't a definitive
+    result — missing sha, fetch errors, no checks, in-progress contexts —
+    maps to 'pending' so callers never treat it as a cacheable failure.
+    """
+    if sha is None:
+        return "pending"
     try:
-        combined_status = pr.get_combined_status()
-    except GithubException as e:
-        logger.warning(f"Failed to get combined status for PR #{pr.number}: {e}")
+        combined_status = get_json(session, f"{API_URL}/repos/{repo_full_name}/commits/{sha}/status")
+    except requests.RequestException as e:
+        logger.warning(f"Failed to get combined status for PR #{number} in {repo_full_name}: {e}")
+        return "pending"
+
+    if combined_status.get("total_count", 0) == 0:
+        logger.info(f"PR #{number}: No CI status checks found.")
+        return "pending"
+
+    for status in combined_status.get("statuses", []):
+        if status["state"].lower() != "success":
+            logger.info(f"PR #{number}: CI check '{status['context']}' state is '{status['state']}'.")
+
+    state = combined_status.get("state", "pending").lower()
+    return state if state in ("success", "failure") else "pending"
+
+
+def enable_auto_merge(token: str, node_id: str, merge_method: str) -> bool:
+    """
+    Ask GitHub to auto-merge the PR server-side; return True on success.
+    Fails (and the caller falls back to a direct merge) when the repo has
+    auto-merge disabled or the PR is already in a clean, mergeable state.
+    """
+    try:
+        graphql_request(
+            token,
+            ENABLE_AUTO_MERGE_MUTATION,
+            {"pullRequestId": node_id, "mergeMethod": merge_method.upper()},
+        )
+        return True
+    except (requests.RequestException, GraphQLError) as e:
+        logger.info(f"Could not enable auto-merge for {node_id}: {e}")
         return False
 
-    if combined_status.total_count == 0:
-        logger.info(f"PR #{pr.number}: No CI status checks found.")
+
+def candidate_ci_state(session: requests.Session, candidate: Dict) -> str:
+    """
+    CI gate for a candidate: the rollup state already came back with the
+    GraphQL scan, so this is a plain field check with no HTTP. Only heads
+    with no rollup at all (no checks configured) fall back to REST. Returns
+    'success', 'failure' or 'pending'; only a genuine failure is safe to
+    cache, since a pending run can still flip either way.
+    """
+    rollup = candidate["rollup_state"]
+    if rollup is None:
+        return combined_status_state(
+            session, candidate["repo_full_name"], candidate["number"], candidate["head_sha"]
+        )
+    if rollup == "SUCCESS":
+        return "success"
+    logger.info(
+        f"PR #{candidate['number']} in {candidate['repo_full_name']}: "
+        f"CI rollup state is '{rollup}'."
+    )
+    return "failure" if rollup in ("FAILURE", "ERROR") else "pending"
+
+
+def merge_candidate(
+    session: requests.Session,
+    candidate: Dict,
+    merge_method: str = "squash",
+    dry_run: bool = False,
+    token: Optional[str] = None,
+) -> bool:
+    """
+    Merge a candidate produced by fetch_candidates; return True if merged or
+    handed off to server-side auto-merge. Non-draft candidates are first
+    offered to GitHub's auto-merge, which merges them with zero further
+    client traffic; only when that is unavailable does the client-side
+    mergeable/CI evaluation and merge PUT run.
+    """
+    repo_name = candidate["repo_full_name"]
+    number = candidate["number"]
+    logger.info(f"Evaluating PR #{number} in {repo_name}: '{candidate['title']}'")
+
+    if dry_run:
+        logger.info(f"[Dry-run] Would merge PR #{number} in {repo_name} - '{candidate['title']}'")
         return False
 
-    for status in combined_status.statuses:
-        if status.state.lower() != "success":
-            logger.info(f"PR #{pr.number}: CI check '{status.context}' state is '{status.state}'.")
+    cache_key = f"{candidate['repo_id']}:{number}:{candidate['head_sha']}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        if cached.get("is_merged"):
+            logger.info(f"PR #{number} in {repo_name} was already merged on a previous run.")
+            return False
+        if cached.get("failed_ci"):
+            logger.info(f"PR #{number} in {repo_name} failed CI recently; skipping re-check.")
             return False
-    return True
 
+    if candidate["draft"]:
+        logger.info(f"PR #{number} in {repo_name} is a draft. Skipping.")
+        return False
+
+    if token and candidate.get("node_id") and enable_auto_merge(token, candidate["node_id"], merge_method):
+        logger.info(f"Auto-merge enabled for PR #{number} in {repo_name}; GitHub merges it server-side.")
+        return True
+
+    if candidate["mergeable"] != "MERGEABLE":
+        logger.info(f"PR #{number} in {repo_name} is not mergeable (state={candidate['mergeable']}).")
+        return False
+
+    ci_state = candidate_ci_state(session, candidate)
+    if ci_state != "success":
+        logger.info(f"PR #{number} in {repo_name}: CI checks are {ci_state}.")
+        if ci_state == "failure":
+            cache.set(cache_key, {"failed_ci": True}, ttl=FAILED_CI_TTL)
+        return False
 
-def merge_pr(pr: PullRequest.PullRequest, merge_method: str = "squash", dry_run: bool = False) -> bool:
+    try:
+        logger.info(f"Merging PR #{number} in {repo_name} - '{candidate['title']}'")
+        rest_merge_pull(session, repo_name, number, merge_method)
+        cache.set(cache_key, {"is_merged": True})
+        logger.info(f"PR #{number} in {repo_name} merged successfully.")
+        return True
+    except requests.RequestException as e:
+        logger.error(f"Failed to merge PR #{number} in {repo_name}: {e}")
+        return False
+
+
+def merge_pr(
+    pr: PullRequest.PullRequest,
+    ref: PRRef,
+    session: requests.Session,
+    merge_method: str = "squash",
+    dry_run: bool = False,
+) -> bool:
     """
-    Attempt to merge PR; return True if merged, False otherwise.
+    Attempt to merge PR; return True if merged, False otherwise. All logging
+    and lookups go through the pre-built ref; the live object is only used
+    for state checks and the final merge call.
     """
-    repo_name = pr.base.repo.full_name
-    logger.info(f"Evaluating PR #{pr.number} in {repo_name}: '{pr.title}'")
+    logger.info(f"Evaluating PR #{ref.number} in {ref.repo_name}: '{ref.title}'")
 
     if dry_run:
-        print(f"[Dry-run] Would merge PR #{pr.number} in {repo_name} - '{pr.title}'")
+        logger.info(f"[Dry-run] Would merge PR #{ref.number} in {ref.repo_name} - '{ref.title}'")
         return False
 
-    if pr.is_merged():
-        logger.info(f"PR #{pr.number} in {repo_name} is already merged.")
+    # merged_at, state and draft are all present in the list-pulls payload;
+    # read them from _rawData so none of these checks costs a round-trip
+    # (pr.is_merged() alone is a full GET).
+    raw = pr._rawData
+    if raw.get("merged_at") is not None:
+        logger.info(f"PR #{ref.number} in {ref.repo_name} is already merged.")
         return False
 
-    if pr.state != "open":
-        logger.info(f"PR #{pr.number} in {repo_name} is not open (state={pr.state}). Skipping.")
+    state = raw["state"]
+    if state != "open":
+        logger.info(f"PR #{ref.number} in {ref.repo_name} is not open (state={state}). Skipping.")
         return False
 
-    if pr.draft:
-        logger.info(f"PR #{pr.number} in {repo_name} is a draft. Skipping.")
+    if raw.get("draft", False):
+        logger.info(f"PR #{ref.number} in {ref.repo_name} is a draft. Skipping.")
         return False
 
-    if not wait_for_mergeable(pr):
-        logger.info(f"PR #{pr.number} in {repo_name} is not mergeable.")
-        print(f"PR #{pr.number} in {repo_name} is not mergeable.")
+    # No polling here: a single lazy fetch fills in mergeable, and a PR whose
+    # mergeability GitHub hasn't computed yet is picked up by the webhook
+    # server or the next reconciler run.
+    if not pr.mergeable:
+        logger.info(f"PR #{ref.number} in {ref.repo_name} is not mergeable.")
         return False
 
-    if not ci_checks_passed(pr):
-        logger.info(f"PR #{pr.number} in {repo_name} failed CI checks.")
-        print(f"PR #{pr.number} in {repo_name} failed CI checks.")
+    if combined_status_state(session, ref.repo_name, ref.number, ref.head_sha) != "success":
+        logger.info(f"PR #{ref.number} in {ref.repo_name} failed CI checks.")
         return False
 
     try:
-        print(f"Merging PR #{pr.number} in {repo_name} - '{pr.title}'")
-        pr.merge(merge_method=merge_method, commit_message="Auto-merged by dependabot-auto-merge script")
-        logger.info(f"PR #{pr.number} in {repo_name} merged successfully.")
-        print(f"PR #{pr.number} merged successfully.")
+        logger.info(f"Merging PR #{ref.number} in {ref.repo_name} - '{ref.title}'")
+        _merge_pull(pr, merge_method)
+        logger.info(f"PR #{ref.number} in {ref.repo_name} merged successfully.")
         return True
     except GithubException as e:
-        logger.error(f"Failed to merge PR #{pr.number} in {repo_name}: {e}")
-        print(f"Failed to merge PR #{pr.number} in {repo_name}: {e}")
+        logger.error(f"Failed to merge PR #{ref.number} in {ref.repo_name}: {e}")
         return False
 
 
+REPO_LIST_URL = f"{API_URL}/user/repos?affiliation=owner,collaborator,organization_member&per_page=100"
+REPO_LIST_TTL = 3600
+
+
+@functools.lru_cache(maxsize=1)
+@retry_on_rate_limit
 def get_user_repos_with_write_access(github_client: Github) -> List[Repository.Repository]:
     try:
         user = github_client.get_user()
-        repos = [repo for repo in user.get_repos() if repo.permissions.push]
+        # The affiliation filter prunes read-only collaborations server-side;
+        # the push check stays only as a safety net.
+        repos = [
+            repo
+            for repo in user.get_repos(affiliation="owner,collaborator,organization_member")
+            if repo.permissions.push
+        ]
         return repos
-    except RateLimitExceededException as e:
-        logger.error(f"GitHub API rate limit exceeded: {e}")
-        sys.exit(1)
+    except RateLimitExceededException:
+        # Let the decorator sleep until reset and retry instead of aborting.
+        raise
     except GithubException as e:
+        if e.status == 403 and "rate limit" in str(e.data).lower():
+            raise
         logger.error(f"GitHub API error: {e}")
         sys.exit(1)
 
 
-def main(args: argparse.Namespace) -> None:
-    github_client = get_github_client()
-    repos = get_user_repos_with_write_access(github_client)
-    print(f"Found {len(repos)} repositories with write access.")
+def get_writable_repo_names(github_client: Github, session: requests.Session) -> List[str]:
+    """
+    The writable-repo list is nearly static between runs, so it is cached on
+    disk keyed by the /user/repos ETag: refreshing the ETag is a conditional
+    request (a 304 costs no rate limit), an unchanged ETag keeps reusing the
+    cached list, and any change rotates the key and forces a full relist.
+    """
+    try:
+        get_json(session, REPO_LIST_URL)
+    except requests.RequestException as e:
+        logger.warning(f"Failed to refresh repo-list ETag: {e}")
+    cached = _etag_lookup(REPO_LIST_URL)
+    key = f"repo-names:{cached[0] if cached else 'no-etag'}"
+    names = cache.get(key)
+    if names is None:
+        names = [repo.full_name for repo in get_user_repos_with_write_access(github_client)]
+        cache.set(key, names, ttl=REPO_LIST_TTL)
+    return names
+
+
+def process_repo(
+    repo: Repository.Repository,
+    full_name: str,
+    session: requests.Session,
+    args: argparse.Namespace,
+) -> tuple:
+    """
+    Check one repo's open PRs and merge the eligible Dependabot ones;
+    return (checked, merged) counts for this repo.
+    """
+    checked = 0
+    merged = 0
+
+    logger.info(f"Checking repository: {full_name}")
+    try:
+        pulls = _list_open_pulls(repo)
+    except GithubException as e:
+        logger.warning(f"Failed to fetch PRs for {full_name}: {e}")
+        return checked, merged
+
+    candidates = []
+    for pr in pulls:
+        checked += 1
+        if is_dependabot_pr(pr):
+            candidates.append((pr, PRRef.from_pull(pr)))
+
+    def attempt(item) -> bool:
+        pr, ref = item
+        REQUEST_BUCKET.consume()
+        return merge_pr(pr, ref, session, merge_method=args.merge_method, dry_run=args.dry_run)
+
+    if candidates:
+        with ThreadPoolExecutor(max_workers=min(MERGES_PER_REPO, len(candidates))) as merge_pool:
+            merged = sum(merge_pool.map(attempt, candidates))
+
+    return checked, merged
 
-    excluded = set(args.exclude_repos or [])
+
+def scan_repos_rest(
+    github_client: Github,
+    session: requests.Session,
+    excluded: set,
+    args: argparse.Namespace,
+) -> tuple:
+    """
+    REST fallback: walk every writable repo and its open PRs with PyGithub,
+    one repo per worker thread. Used only when the GraphQL scan is unavailable.
+    """
+    repo_names = get_writable_repo_names(github_client, session)
+    logger.info(f"Found {len(repo_names)} repositories with write access.")
 
     total_prs_checked = 0
     total_prs_merged = 0
 
-    for repo in repos:
-        if repo.name in excluded:
-            print(f"Skipping excluded repository: {repo.full_name}")
-            continue
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = []
+        for full_name in repo_names:
+            if full_name.split("/", 1)[1] in excluded:
+                logger.info(f"Skipping excluded repository: {full_name}")
+                continue
+            # Lazy handles carry just the URL; nothing is fetched until the
+            # worker lists the repo's pulls.
+            repo = github_client.get_repo(full_name, lazy=True)
+            futures.append(executor.submit(process_repo, repo, full_name, session, args))
+        for future in as_completed(futures):
+            checked, merged = future.result()
+            total_prs_checked += checked
+            total_prs_merged += merged
 
-        print(f"Checking repository: {repo.full_name}")
-        try:
-            pulls = repo.get_pulls(state="open", sort="updated", direction="desc")
-        except GithubException as e:
-            logger.warning(f"Failed to fetch PRs for {repo.full_name}: {e}")
-            continue
+    return total_prs_checked, total_prs_merged
 
-        for pr in pulls:
-            total_prs_checked += 1
-            if is_dependabot_pr(pr):
-                if merge_pr(pr, merge_method=args.merge_method, dry_run=args.dry_run):
-                    total_prs_merged += 1
-                time.sleep(0.2)
 
-    print(f"Checked {total_prs_checked} PR(s), merged {total_prs_merged} PR(s).")
+def main(args: argparse.Namespace) -> None:
+    log_buffer = setup_logging(verbose=args.verbose)
+    token = get_github_token()
+    github_client = get_github_client(token)
+    rest_session = make_rest_session(token)
+
+    excluded = set(args.exclude_repos or [])
+
+    try:
+        candidates = fetch_candidates(token)
+    except (requests.RequestException, GraphQLError) as e:
+        logger.warning(f"GraphQL scan failed, falling back to REST: {e}")
+        total_prs_checked, total_prs_merged = scan_repos_rest(github_client, rest_session, excluded, args)
+    else:
+        logger.info(f"Found {len(candidates)} open bot PR(s) across writable repositories.")
+        resolve_unknown_mergeables(token, candidates)
+
+        total_prs_checked = 0
+        total_prs_merged = 0
+
+        def attempt(candidate: Dict) -> bool:
+            REQUEST_BUCKET.consume()
+            return merge_candidate(
+                rest_session, candidate, merge_method=args.merge_method, dry_run=args.dry_run, token=token
+            )
+
+        def process_candidates(repo_candidates: List[Dict]) -> tuple:
+            with ThreadPoolExecutor(max_workers=min(MERGES_PER_REPO, len(repo_candidates))) as merge_pool:
+                merged = sum(merge_pool.map(attempt, repo_candidates))
+            return len(repo_candidates), merged
+
+        by_repo: Dict[str, List[Dict]] = {}
+        for candidate in candidates:
+            if candidate["repo_name"] in excluded:
+                logger.info(f"Skipping excluded repository: {candidate['repo_full_name']}")
+                continue
+            by_repo.setdefault(candidate["repo_full_name"], []).append(candidate)
+
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(process_candidates, group) for group in by_repo.values()]
+            for future in as_completed(futures):
+                checked, merged = future.result()
+                total_prs_checked += checked
+                total_prs_merged += merged
+
+    logger.info(f"Checked {total_prs_checked} PR(s), merged {total_prs_merged} PR(s).")
+    log_buffer.flush()
 
 
 if __name__ == "__main__":
@@ -170,6 +800,17 @@ if __name__ == "__main__":
         default=[],
         help="List of repository names to exclude from processing.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=16,
+        help="Number of worker threads used to process repositories concurrently.",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Also stream log records to stdout instead of only the log file.",
+    )
     args = parser.parse_args()
 
     main(args)
@@ -0,0 +1,231 @@
+"""
+Event-driven companion to script.py: a small webhook receiver that merges
+Dependabot PRs when GitHub reports them mergeable with passing checks,
+instead of polling for that state. Run script.py occasionally as the
+cold-start reconciler; run this server to react to events in between.
+"""
+import os
+import sys
+import hmac
+import json
+import logging
+import logging.handlers
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import cache
+import script
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = "/webhook"
+WEBHOOK_EVENTS = ["pull_request", "status", "check_suite"]
+
+# Actions on pull_request events that warrant (re-)evaluating the PR.
+PR_ACTIONS = ("opened", "reopened", "synchronize", "ready_for_review")
+
+
+def get_webhook_secret() -> str:
+    # Without a secret every delivery would verify, and a forged
+    # pull_request payload could name any PR as a bot PR and have it merged
+    # with the operator's token — so refuse to run unsecured.
+    secret = os.getenv("WEBHOOK_SECRET")
+    if not secret:
+        logger.error("Environment variable 'WEBHOOK_SECRET' is not set.")
+        print("Error: Please set your WEBHOOK_SECRET environment variable.")
+        sys.exit(1)
+    return secret
+
+
+def verify_signature(secret: str, body: bytes, signature_header: Optional[str]) -> bool:
+    if not secret:
+        return False
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header or "")
+
+
+def candidate_from_payload(repository: Dict, pr: Dict) -> Dict:
+    """Build a merge_candidate-compatible dict from a webhook PR payload."""
+    return {
+        "node_id": pr.get("node_id"),
+        "repo_full_name": repository["full_name"],
+        "repo_name": repository["name"],
+        "repo_id": repository["id"],
+        "number": pr["number"],
+        "title": pr["title"],
+        "draft": pr.get("draft", False),
+        # Webhook payloads usually carry mergeable=null; resolve on demand.
+        "mergeable": "UNKNOWN",
+        "head_sha": pr["head"]["sha"],
+        "rollup_state": None,
+    }
+
+
+def _pending_key(repo_full_name: str, head_sha: str) -> str:
+    return f"pending:{repo_full_name}:{head_sha}"
+
+
+class MergeWorker:
+    """Holds the API handles and evaluates one candidate per event."""
+
+    def __init__(self, token: str, merge_method: str, dry_run: bool):
+        self.token = token
+        self.session = script.make_rest_session(token)
+        self.merge_method = merge_method
+        self.dry_run = dry_run
+
+    def evaluate(self, candidate: Dict) -> None:
+        key = _pending_key(candidate["repo_full_name"], candidate["head_sha"])
+        script.resolve_unknown_mergeables(self.token, [candidate])
+        if candidate["mergeable"] == "UNKNOWN":
+            # GitHub has not computed mergeability yet; keep the candidate
+            # pending and wait for the next event instead of polling.
+            cache.set(key, candidate, ttl=86400)
+            return
+        merged = script.merge_candidate(
+            self.session,
+            candidate,
+            merge_method=self.merge_method,
+            dry_run=self.dry_run,
+            token=self.token,
+        )
+        if merged:
+            cache.delete(key)
+        else:
+            cache.set(key, candidate, ttl=86400)
+
+    def handle_pull_request(self, payload: Dict) -> None:
+        if payload.get("action") not in PR_ACTIONS:
+            return
+        pr = payload["pull_request"]
+        if (pr.get("user") or {}).get("login") not in script.BOT_LOGINS:
+            return
+        self.evaluate(candidate_from_payload(payload["repository"], pr))
+
+    def handle_commit_event(self, repo_full_name: str, head_sha: str, success: bool) -> None:
+        if not success:
+            return
+        candidate = cache.get(_pending_key(repo_full_name, head_sha))
+        if candidate is None:
+            return
+        # The checks on this head just finished; drop any negative verdict
+        # cached while they were still running so merge_candidate actually
+        # re-evaluates instead of short-circuiting on the stale entry.
+        cache.delete(f"{candidate['repo_id']}:{candidate['number']}:{candidate['head_sha']}")
+        self.evaluate(candidate)
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    worker: MergeWorker = None
+    secret: str = ""
+    log_buffer: logging.handlers.MemoryHandler = None
+
+    def do_POST(self) -> None:
+        if self.path != WEBHOOK_PATH:
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not verify_signature(self.secret, body, self.headers.get("X-Hub-Signature-256")):
+            logger.warning("Rejected webhook delivery with bad signature.")
+            self.send_error(403)
+            return
+        event = self.headers.get("X-GitHub-Event", "")
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError:
+            self.send_error(400)
+            return
+        self.send_response(202)
+        self.end_headers()
+        threading.Thread(target=self._dispatch, args=(event, payload), daemon=True).start()
+
+    def _dispatch(self, event: str, payload: Dict) -> None:
+        try:
+            if event == "pull_request":
+                self.worker.handle_pull_request(payload)
+            elif event == "status":
+                self.worker.handle_commit_event(
+                    payload["repository"]["full_name"], payload["sha"], payload["state"] == "success"
+                )
+            elif event == "check_suite":
+                suite = payload["check_suite"]
+                self.worker.handle_commit_event(
+                    payload["repository"]["full_name"],
+                    suite["head_sha"],
+                    payload.get("action") == "completed" and suite.get("conclusion") == "success",
+                )
+        except Exception as e:
+            logger.error(f"Failed to handle {event} event: {e}")
+        finally:
+            # Deliveries can be minutes apart, so don't let a merge sit
+            # invisible in the batch buffer until 50 records accumulate.
+            self.log_buffer.flush()
+
+    def log_message(self, format: str, *log_args) -> None:
+        logger.info("%s - %s" % (self.address_string(), format % log_args))
+
+
+def register_webhooks(github_client, url: str, secret: str) -> None:
+    """Create the webhook once on every writable repo that doesn't have it."""
+    for repo in script.get_user_repos_with_write_access(github_client):
+        try:
+            if any(hook.config.get("url") == url for hook in repo.get_hooks()):
+                continue
+            repo.create_hook(
+                "web",
+                config={"url": url, "content_type": "json", "secret": secret},
+                events=WEBHOOK_EVENTS,
+                active=True,
+            )
+            logger.info(f"Registered webhook on {repo.full_name}")
+        except script.GithubException as e:
+            logger.warning(f"Failed to register webhook on {repo.full_name}: {e}")
+
+
+def main(args: argparse.Namespace) -> None:
+    log_buffer = script.setup_logging(verbose=args.verbose)
+    token = script.get_github_token()
+    secret = get_webhook_secret()
+
+    if args.register:
+        register_webhooks(script.get_github_client(token), args.register, secret)
+        log_buffer.flush()
+        return
+
+    WebhookHandler.worker = MergeWorker(token, args.merge_method, args.dry_run)
+    WebhookHandler.secret = secret
+    WebhookHandler.log_buffer = log_buffer
+    server = ThreadingHTTPServer((args.host, args.port), WebhookHandler)
+    logger.info(f"Listening for webhook deliveries on {args.host}:{args.port}{WEBHOOK_PATH}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge Dependabot PRs in response to GitHub webhook events.")
+    parser.add_argument("--host", default="0.0.0.0", help="Address to bind the webhook server to.")
+    parser.add_argument("--port", type=int, default=8080, help="Port to bind the webhook server to.")
+    parser.add_argument(
+        "--merge-method",
+        choices=["merge", "squash", "rebase"],
+        default="squash",
+        help="Merge method to use when merging PRs.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show PRs that would be merged without actually merging.",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Also stream log records to stdout instead of only the log file.",
+    )
+    parser.add_argument(
+        "--register",
+        metavar="URL",
+        help="Register the webhook at this public URL on every writable repository, then exit.",
+    )
+    main(parser.parse_args())